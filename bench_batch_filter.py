@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import numpy as np
+
+from dog_filter import BATCH_MEMORY_BUDGET, apply_dog_vision_filter, apply_dog_vision_filter_batch
+from rawframes import RawFrameReplay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare filtering pictures one at a time against the batch filter.")
+    parser.add_argument("--width", type=int, default=640, help="picture width")
+    parser.add_argument("--height", type=int, default=480, help="picture height")
+    parser.add_argument("--frames", type=int, default=200, help="how many pictures to filter")
+    parser.add_argument("--replay", help="use the pictures from a raw frame recording instead of random ones")
+    parser.add_argument("--budget-mb", type=float, default=BATCH_MEMORY_BUDGET / (1024 * 1024), help="batch scratch space in MB")
+    args = parser.parse_args()
+
+    if args.replay:
+        # Real pictures from a kiosk, read straight out of the file without copying
+        replay = RawFrameReplay(args.replay, paced=False)
+        frames = replay.frames[:args.frames]
+        args.frames, args.height, args.width = frames.shape[:3]
+    else:
+        # Random pictures with every colour in them, so all parts of the filter get used
+        generator = np.random.default_rng(0)
+        frames = generator.integers(0, 256, size=(args.frames, args.height, args.width, 3), dtype=np.uint8)
+    out = np.empty_like(frames)
+    budget = int(args.budget_mb * 1024 * 1024)
+
+    started = time.perf_counter()
+    for index, frame in enumerate(frames):
+        out[index] = apply_dog_vision_filter(frame)
+    single_fps = args.frames / (time.perf_counter() - started)
+    expected = out.copy()
+
+    started = time.perf_counter()
+    apply_dog_vision_filter_batch(frames, out, memory_budget=budget)
+    batch_fps = args.frames / (time.perf_counter() - started)
+
+    if not np.array_equal(out, expected):
+        print("Warning: the batch filter's pictures are different from the one-at-a-time ones!")
+
+    print(f"{args.frames} frames of {args.width}x{args.height}")
+    print(f"  one at a time: {single_fps:8.1f} frames per second")
+    print(f"  batched:       {batch_fps:8.1f} frames per second ({batch_fps / single_fps:.2f}x, {args.budget_mb:g} MB budget)")
+
+
+if __name__ == "__main__":
+    main()
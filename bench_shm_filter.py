@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import numpy as np
+
+from dog_filter import apply_dog_vision_filter
+from rawframes import RawFrameReplay
+from shm_filter import ProcessFilterPool
+
+
+def make_frames(count, height, width):
+    # Random pictures with every colour in them, so all parts of the filter get used
+    generator = np.random.default_rng(0)
+    return generator.integers(0, 256, size=(count, height, width, 3), dtype=np.uint8)
+
+
+def bench_single_process(frames, start_row):
+    started = time.perf_counter()
+    for frame in frames:
+        dog_half = apply_dog_vision_filter(frame[start_row:])
+        np.vstack((frame[:start_row], dog_half))
+    return len(frames) / (time.perf_counter() - started)
+
+
+def bench_pool(pool, frames, start_row):
+    started = time.perf_counter()
+    for frame in frames:
+        index, slot = pool.next_input()
+        slot[:] = frame
+        pool.submit(index, start_row=start_row)
+        pool.result(index)
+    return len(frames) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the dog vision filter in one process against the shared-memory worker pool.")
+    parser.add_argument("--width", type=int, default=480, help="picture width (after rotating)")
+    parser.add_argument("--height", type=int, default=640, help="picture height (after rotating)")
+    parser.add_argument("--frames", type=int, default=200, help="how many pictures to filter")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPUs - 1)")
+    parser.add_argument("--replay", help="use the pictures from a raw frame recording instead of random ones")
+    parser.add_argument("--split", type=float, default=0.40, help="part of the picture left unfiltered, like the split view")
+    args = parser.parse_args()
+
+    if args.replay:
+        # Real pictures from a kiosk, read straight out of the file without copying
+        replay = RawFrameReplay(args.replay, paced=False)
+        frames = replay.frames[:args.frames]
+        args.frames, args.height, args.width = frames.shape[:3]
+    else:
+        frames = make_frames(args.frames, args.height, args.width)
+    start_row = int(args.height * args.split)
+
+    # Make the pool first, before this process does any OpenCV work (see ProcessFilterPool)
+    with ProcessFilterPool((args.height, args.width, 3), workers=args.workers) as pool:
+        # Check the pool gives exactly the same picture
+        index, slot = pool.next_input()
+        slot[:] = frames[0]
+        pool.submit(index, start_row=start_row)
+        expected = np.vstack((frames[0][:start_row], apply_dog_vision_filter(frames[0][start_row:])))
+        if not np.array_equal(pool.result(index), expected):
+            print("Warning: the worker pool's picture is different from the single-process one!")
+
+        single_fps = bench_single_process(frames, start_row)
+        pool_fps = bench_pool(pool, frames, start_row)
+        workers = pool.workers
+
+    print(f"{args.frames} frames of {args.width}x{args.height}, {args.split:.0%} left unfiltered")
+    print(f"  single process:        {single_fps:8.1f} frames per second")
+    print(f"  pool with {workers} workers: {pool_fps:8.1f} frames per second ({pool_fps / single_fps:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
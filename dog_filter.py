@@ -0,0 +1,180 @@
+import json
+import math
+
+import cv2  # This lets us use the camera and change pictures
+import numpy as np  # This helps us do math with lots of numbers at once
+
+# The knobs for the dog vision filter. These can be changed in dogvision.json while it runs.
+DEFAULT_PARAMS = {
+    "blue_hue": [100, 140],  # Blue in HSV hue space
+    "yellow_hue": [20, 40],  # Yellow in HSV hue space
+    "boost_gain": 1.5,  # How much stronger blue and yellow get
+    "red_green_gain": 0.1,  # How much colour red and green keep (almost none)
+    "other_gain": 0.5,  # How much colour everything else keeps
+    "split": 0.40,  # How much of the screen shows human vision, from 0 up to (not including) 1
+    "blur_kernel": 11,  # How blurry dogs see (must be an odd number, up to MAX_BLUR_KERNEL)
+}
+
+# The biggest blur we allow. Much bigger blurs are slow enough to make the pictures stutter.
+MAX_BLUR_KERNEL = 31
+
+# Roughly how many bytes of scratch space the batch filter needs per pixel
+# (the HSV copy, the table index and a little spare)
+BATCH_BYTES_PER_PIXEL = 8
+
+# How much scratch space the batch filter uses by default. Small groups that fit in the
+# CPU's cache are faster than one huge group.
+BATCH_MEMORY_BUDGET = 4 * 1024 * 1024
+
+
+def load_params(path):
+    """Read filter knobs from a JSON file. Anything missing keeps its default value."""
+    with open(path) as config_file:
+        changes = json.load(config_file)
+    if not isinstance(changes, dict):
+        raise ValueError(f"{path} should hold a JSON object of filter settings")
+    unknown = set(changes) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"unknown filter settings in {path}: {', '.join(sorted(unknown))}")
+    params = dict(DEFAULT_PARAMS)
+    params.update(changes)
+    return params
+
+
+def _build_saturation_table(params):
+    """
+    Work out the new saturation for every (hue, saturation) pair once, up front.
+    table[h * 256 + s] is the new saturation, using exactly the same maths as the colour masks.
+    """
+    blue_low, blue_high = params["blue_hue"]
+    yellow_low, yellow_high = params["yellow_hue"]
+    h = np.arange(256)
+
+    # every other colour gets a little weaker
+    gain = np.full(256, params["other_gain"], dtype=np.float32)
+
+    # select red and green colour and make them almost grey
+    gain[(h < yellow_low) | ((h > yellow_high) & (h < blue_low))] = params["red_green_gain"]
+
+    # select the blue and yellow colours and make them stronger
+    gain[(h >= blue_low) & (h <= blue_high)] = params["boost_gain"]
+    gain[(h >= yellow_low) & (h <= yellow_high)] = params["boost_gain"]
+
+    s = np.arange(256, dtype=np.float32)
+    table = np.clip(gain[:, None] * s[None, :], 0, 255)
+    return table.astype(np.uint8).ravel()
+
+
+def _is_number(value):
+    # True and False are numbers to Python, but not to us
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _check_params(params):
+    """Raise ValueError if any knob has a value the filter can't use."""
+    for name in ("boost_gain", "red_green_gain", "other_gain"):
+        if not _is_number(params[name]) or params[name] < 0:
+            raise ValueError(f"{name} must be a number that is 0 or more, not {params[name]!r}")
+    for name in ("blue_hue", "yellow_hue"):
+        band = params[name]
+        if not isinstance(band, (list, tuple)) or len(band) != 2 or not all(_is_number(hue) for hue in band) or band[0] > band[1]:
+            raise ValueError(f"{name} must be two numbers [low, high], not {band!r}")
+    kernel = params["blur_kernel"]
+    if isinstance(kernel, bool) or not isinstance(kernel, (int, np.integer)) or not 1 <= kernel <= MAX_BLUR_KERNEL or kernel % 2 == 0:
+        raise ValueError(f"blur_kernel must be an odd whole number from 1 to {MAX_BLUR_KERNEL}, not {kernel!r}")
+    # The dog-vision part must never be empty, so split has to stay below 1
+    if not _is_number(params["split"]) or not 0.0 <= params["split"] < 1.0:
+        raise ValueError(f"split must be at least 0 and less than 1, not {params['split']!r}")
+
+
+class FilterState:
+    """
+    Everything the filter needs that can be worked out ahead of time from the knobs
+    (the saturation table and the blur size). Once made it never changes, so a new one
+    can be built in the background and swapped in between pictures.
+    """
+
+    def __init__(self, params=None):
+        params = dict(DEFAULT_PARAMS if params is None else params)
+        _check_params(params)
+        kernel = int(params["blur_kernel"])
+
+        self.params = params
+        self.split = float(params["split"])
+        self.blur_kernel = (kernel, kernel)
+        # How many rows above and below a pixel the blur looks at
+        self.blur_radius = kernel // 2
+        self.saturation_table = _build_saturation_table(params)
+
+
+DEFAULT_STATE = FilterState()
+
+
+def _adjust_saturation(hsv, state):
+    # Look up the new saturation for each pixel from its hue and saturation (changes hsv in place)
+    index = hsv[..., 0].astype(np.uint16)
+    index <<= 8
+    index |= hsv[..., 1]
+    hsv[..., 1] = state.saturation_table[index]
+
+
+def apply_dog_vision_filter(frame, state=DEFAULT_STATE):
+    # Apply blur first to simulate dog's less sharp vision
+    frame = cv2.GaussianBlur(frame, state.blur_kernel, 0)
+
+    # convert it to hue saturation and value
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+
+    # boost blue and yellow, fade red and green, using the pre-made table
+    _adjust_saturation(hsv, state)
+
+    # convert it back to what the format was
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+
+def batch_size_for_budget(frame_shape, memory_budget):
+    """How many pictures of this shape we can filter at once without going over memory_budget bytes."""
+    pixels = frame_shape[0] * frame_shape[1]
+    return max(1, memory_budget // (pixels * BATCH_BYTES_PER_PIXEL))
+
+
+def apply_dog_vision_filter_batch(frames, out=None, memory_budget=BATCH_MEMORY_BUDGET, state=DEFAULT_STATE):
+    """
+    Filter lots of pictures at once, for going through recorded footage quickly.
+
+    frames can be an N x H x W x 3 array or a list of H x W x 3 pictures (all the same size).
+    The results go into out (an N x H x W x 3 array, made for you if you don't pass one),
+    which is also returned. Pictures are done in groups small enough to keep the scratch
+    space under memory_budget bytes, and each group's colours are changed in one go.
+    """
+    count = len(frames)
+    if count == 0:
+        return out if out is not None else np.empty((0, 0, 0, 3), dtype=np.uint8)
+    height, width = frames[0].shape[:2]
+    if out is None:
+        out = np.empty((count, height, width, 3), dtype=np.uint8)
+    if out.shape != (count, height, width, 3) or out.dtype != np.uint8 or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a contiguous uint8 array of shape {(count, height, width, 3)}")
+
+    for index in range(count):
+        frame = frames[index]
+        if frame.shape != (height, width, 3) or frame.dtype != np.uint8:
+            raise ValueError(f"frame {index} must be a uint8 picture of shape {(height, width, 3)}, not {frame.dtype} {frame.shape}")
+
+    batch_size = batch_size_for_budget((height, width), memory_budget)
+    for first in range(0, count, batch_size):
+        last = min(count, first + batch_size)
+
+        # The blur has to be done one picture at a time (otherwise it would smudge
+        # pictures into each other), so it writes straight into out
+        for index in range(first, last):
+            cv2.GaussianBlur(frames[index], state.blur_kernel, 0, dst=out[index])
+
+        # The colour change works pixel by pixel, so the whole group can be treated
+        # as one very tall picture
+        tall = out[first:last].reshape(-1, width, 3)
+        hsv = cv2.cvtColor(tall, cv2.COLOR_BGR2HSV)
+        _adjust_saturation(hsv, state)
+        cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=tall)
+
+    return out
@@ -1,6 +1,8 @@
 import pygame
 import cv2
 import numpy as np
+from frame_scheduler import FrameScheduler
+from dog_filter import DEFAULT_PARAMS, FilterState, apply_dog_vision_filter
 
 pygame.init()
 
@@ -18,30 +20,19 @@ screen_info = pygame.display.Info()
 screen_width, screen_height = screen_info.current_w, screen_info.current_h
 screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
 
-clock = pygame.time.Clock()
+# 30 FPS, using a deadline for each frame instead of sleeping after it
+scheduler = FrameScheduler(fps=30)
 dog_vision_enabled = True
 font = pygame.font.Font(None, 36)
 
-def apply_dog_vision_filter(frame):
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
-    s = s.astype(np.float32)
-
-    blue_mask = (h >= 100) & (h <= 140)
-    s[blue_mask] = np.minimum(s[blue_mask] * 1.5, 255)
-    
-    yellow_mask = (h >= 20) & (h <= 40)
-    s[yellow_mask] = np.minimum(s[yellow_mask] * 1.5, 255)
-    
-    red_green_mask = (h < 20) | ((h > 40) & (h < 100))
-    s[red_green_mask] = np.maximum(s[red_green_mask] * 0.1, 0)
-    
-    s = s.astype(np.uint8)
-    hsv = cv2.merge([h, s, v])
-    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+# This script's look: no blur, red and green fade, and other colours stay as they are
+filter_state = FilterState(dict(DEFAULT_PARAMS, blur_kernel=1, other_gain=1.0, split=0.5))
 
 try:
     while True:
+        # Wait until just before the next frame's deadline, so we capture the newest frame
+        scheduler.wait_to_start()
+
         ret, frame = cap.read()
         if not ret:
             print("Oops! Couldn’t get a picture from the camera.")
@@ -50,10 +41,10 @@ try:
         frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
         frame = cv2.flip(frame, 1)
 
-        middle = frame.shape[1] // 2  # Split using width
+        middle = int(frame.shape[1] * filter_state.split)  # Split using width
         left_half, right_half = frame[:, :middle], frame[:, middle:]
         if dog_vision_enabled:
-            right_half_dog = apply_dog_vision_filter(right_half)
+            right_half_dog = apply_dog_vision_filter(right_half, filter_state)
             frame = np.hstack((left_half, right_half_dog))
         
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -64,7 +55,11 @@ try:
         filter_status = "Dog Filter: ON" if dog_vision_enabled else "Dog Filter: OFF"
         text_surface = font.render(filter_status, True, (255, 255, 255))
         screen.blit(text_surface, (screen_width - text_surface.get_width() - 10, 10))
-        pygame.display.flip()
+
+        # Show the frame on its deadline, or drop it if it's too late
+        if scheduler.wait_to_present():
+            pygame.display.flip()
+            scheduler.presented()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
@@ -79,6 +74,7 @@ try:
                 dog_vision_enabled = tap_x >= screen_width // 2
 
 finally:
+    print("Frame timing:", scheduler.stats())
     cap.release()
     pygame.quit()
 
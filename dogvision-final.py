@@ -1,60 +1,110 @@
-import pygame  # This helps us make a window and show pictures
-import cv2  # This lets us use the camera and change pictures
-import numpy as np  # This helps us do math with lots of numbers at once
-
-# Start pygame so we can use it to show stuff on the screen
-pygame.init()
-
-# Turn on the camera (the "0" means use the first camera the computer finds)
-cap = cv2.VideoCapture(0)
+import os
+import time
+from startup import StartupTimer, open_camera, open_replay, warm_up_filter  # This helps us start up fast
+from frame_scheduler import FrameScheduler  # This keeps the pictures coming at a steady pace
+
+# A stopwatch that writes down how long each part of starting up takes
+startup_timer = StartupTimer()
+
+# Turn on the camera (the "0" means use the first camera the computer finds).
+# This is slow, so it happens in the background while we get the screen ready.
+# Set DOGVISION_REPLAY=some.raw to play back a recording instead of using the camera.
+REPLAY_PATH = os.environ.get("DOGVISION_REPLAY")
+if REPLAY_PATH:
+    camera_starting = startup_timer.run_in_background("open replay", open_replay, REPLAY_PATH)
+else:
+    camera_starting = startup_timer.run_in_background("open camera", open_camera, 0)
+
+with startup_timer.step("import pygame"):
+    import pygame  # This helps us make a window and show pictures
+
+# Start only the parts of pygame we use (the screen and the letters, not sound)
+with startup_timer.step("start display and fonts"):
+    pygame.display.init()
+    pygame.font.init()
+
+    # Make a font to write words on the screen
+    font = pygame.font.Font(None, 36)
+
+with startup_timer.step("import cv2 and numpy"):
+    import cv2  # This lets us use the camera and change pictures
+    import numpy as np  # This helps us do math with lots of numbers at once
+    from dog_filter import FilterState, apply_dog_vision_filter  # This makes pictures look like a dog sees them
+    from idle_mode import SceneIdleDetector  # This notices when nothing is moving (it uses cv2 and numpy too)
+    from param_watcher import ParamWatcher  # This notices when the filter settings file changes
+
+# Wait for the camera to be ready
+with startup_timer.step("wait for camera"):
+    cap, frame_width, frame_height = camera_starting.result()
 
 # Check if the camera turned on okay
 if not cap.isOpened():
     print("Oops! The camera didn't turn on.")
     exit()
 
-# Find out how big the camera's pictures are
-frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+# Only keep the newest picture waiting in the camera, so when we read slowly (idle mode)
+# we don't get old pictures from a queue
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+# Set DOGVISION_WORKERS=4 (for example) to run the filter in 4 separate processes at once.
+# The pool is made now, before we do any heavy OpenCV work in this process and before
+# any other threads (like the settings watcher below) start.
+FILTER_WORKERS = int(os.environ.get("DOGVISION_WORKERS", "0"))
+filter_pool = None
+if FILTER_WORKERS > 0:
+    from shm_filter import ProcessFilterPool
+    with startup_timer.step("start filter workers"):
+        # After turning the picture, it is frame_width tall and frame_height wide
+        filter_pool = ProcessFilterPool((frame_width, frame_height, 3), workers=FILTER_WORKERS)
+
+# The filter's settings live in dogvision.json (or wherever DOGVISION_CONFIG says).
+# Change and save the file while it's running: the new settings are worked out in the
+# background and swapped in between pictures, so nothing stutters.
+CONFIG_PATH = os.environ.get("DOGVISION_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "dogvision.json"))
+with startup_timer.step("load filter settings"):
+    param_watcher = ParamWatcher(CONFIG_PATH, FilterState)
+
+if filter_pool is not None:
+    filter_pool.set_filter_state(param_watcher.state)
 
 # Create screen with the correct dimensions
-screen = pygame.display.set_mode((frame_width, frame_height), pygame.FULLSCREEN)
-
-# This is like a timer to keep the pictures moving smoothly
-clock = pygame.time.Clock()
-
-# Make a font to write words on the screen
-font = pygame.font.Font(None, 36)
-
-def apply_dog_vision_filter(frame):
-    # Apply blur first to simulate dog's less sharp vision
-    frame = cv2.GaussianBlur(frame, (11, 11), 0)
-    
-    # convert it to hue saturation and value
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
-    s = s.astype(np.float32)
-
-    # select the blue colours
-    blue_mask = (h >= 100) & (h <= 140)
-    s[blue_mask] = np.minimum(s[blue_mask] * 1.5, 255)
-
-    #select the yellow colours
-    yellow_mask = (h >= 20) & (h <= 40)
-    s[yellow_mask] = np.minimum(s[yellow_mask] * 1.5, 255)
-
-    #select red and green colour
-    red_green_mask = (h < 20) | ((h > 40) & (h < 100))
-    s[red_green_mask] = np.maximum(s[red_green_mask] * 0.1, 0)
-
-    # select every other colour
-    non_blue_yellow_mask = ~(blue_mask | yellow_mask | red_green_mask)
-    s[non_blue_yellow_mask] = np.maximum(s[non_blue_yellow_mask] * 0.5, 0)
-
-    # convert it back to what the format was
-    s = s.astype(np.uint8)
-    hsv = cv2.merge([h, s, v])
-    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+with startup_timer.step("create window"):
+    screen = pygame.display.set_mode((frame_width, frame_height), pygame.FULLSCREEN)
+
+# Show something while we finish getting ready, so people know it's working
+placeholder_text = font.render("Starting dog vision...", True, (255, 255, 255))
+screen.fill((0, 0, 0))
+screen.blit(placeholder_text, ((frame_width - placeholder_text.get_width()) // 2, (frame_height - placeholder_text.get_height()) // 2))
+pygame.display.flip()
+
+# This is like a timer to keep the pictures moving smoothly (30 pictures per second).
+# Use FrameScheduler(fps=None) to follow the screen's refresh rate instead.
+ACTIVE_FPS = 30
+scheduler = FrameScheduler(fps=ACTIVE_FPS)
+
+# When nothing moves for a while we only look at the camera a few times a second,
+# and keep showing the last picture, to save power (and keep the computer cool)
+IDLE_FPS = 4
+idle_detector = SceneIdleDetector()
+
+# Set DOGVISION_RECORD=some.raw to save the camera's pictures exactly as they come in,
+# so we can replay them later (DOGVISION_RECORD_FRAMES says how many, 900 is 30 seconds
+# at full speed). The real times are saved with each picture, so idle stretches replay right.
+RECORD_PATH = os.environ.get("DOGVISION_RECORD")
+recorder = None
+if RECORD_PATH:
+    from rawframes import RawFrameRecorder
+    recorder = RawFrameRecorder(
+        RECORD_PATH, frame_width, frame_height, fps=ACTIVE_FPS,
+        capacity=int(os.environ.get("DOGVISION_RECORD_FRAMES", "900")),
+    )
+
+# Try the filter once on a blank picture the size of the dog-vision part of the screen,
+# in the background, so the first real picture doesn't have to wait for the setup
+rotated_height = frame_width  # After turning the picture, its height is the camera's width
+filter_state = param_watcher.state
+filter_shape = (rotated_height - int(rotated_height * filter_state.split), frame_height, 3)
+filter_warming_up = startup_timer.run_in_background("warm up filter", warm_up_filter, apply_dog_vision_filter, filter_shape, filter_state)
 
 # Pre-render text surfaces (moved outside loop since they don't change)
 mode_text = "Human Vision                                                                                                       Dog Vision"
@@ -71,26 +121,62 @@ for dx, dy in outline_positions:
     outline_surfaces.append((outline_surface, (10 + dx, 10 + dy)))
 text_surface = font.render(mode_text, True, (255, 255, 255))
 
+# Keep the window awake while the filter finishes warming up
+while not filter_warming_up.done():
+    pygame.event.pump()
+    time.sleep(0.01)
+filter_warming_up.result()
+
 try:
     while True:
-        # Limit frame rate to 30 FPS
-        clock.tick(30)
-        
+        # Wait until the last moment before the next deadline so we get the newest picture
+        scheduler.wait_to_start()
+
         ret, frame = cap.read()
         if not ret:
             print("Oops! Couldn't get a picture from the camera.")
             break
-        
+
+        # Save the picture exactly as the camera gave it, if we're recording
+        # (when it's full we just stop; the file is finished when we quit, outside the loop)
+        if recorder is not None and not recorder.full:
+            recorder.write(frame)
+            if recorder.full:
+                print("Recording is full, stopped recording.")
+
+        # Is anything moving? If not, keep showing the last picture and go slow
+        was_idle = idle_detector.idle
+        is_idle = idle_detector.update(frame)
+        if is_idle != was_idle:
+            scheduler.set_fps(IDLE_FPS if is_idle else ACTIVE_FPS)
+            print("Idle mode:", "ON" if is_idle else "OFF", idle_detector.stats())
+        if is_idle:
+            scheduler.skip()
+            continue
+
+        # Pick up new filter settings (if they changed) between pictures, never in the middle of one
+        filter_state = param_watcher.state
+        if filter_pool is not None and filter_pool.filter_state is not filter_state:
+            filter_pool.set_filter_state(filter_state)
+
         frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-        frame = cv2.flip(frame, -1)
-        
-        middle = int(frame.shape[0] * 0.40)
-        left_half = frame[:middle, :]
-        right_half = frame[middle:, :]
-                
-        right_half_dog = apply_dog_vision_filter(right_half)
-        
-        frame = np.vstack((left_half, right_half_dog))
+        middle = int(frame.shape[0] * filter_state.split)
+
+        if filter_pool is not None:
+            # Flip the picture straight into shared memory and let the workers filter it
+            slot_index, slot = filter_pool.next_input()
+            cv2.flip(frame, -1, slot)
+            filter_pool.submit(slot_index, start_row=middle)
+            frame = filter_pool.result(slot_index)
+        else:
+            frame = cv2.flip(frame, -1)
+            left_half = frame[:middle, :]
+            right_half = frame[middle:, :]
+
+            right_half_dog = apply_dog_vision_filter(right_half, filter_state)
+
+            frame = np.vstack((left_half, right_half_dog))
+
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         frame_surface = pygame.surfarray.make_surface(frame_rgb)
         screen.blit(frame_surface, (0, 0))
@@ -104,9 +190,20 @@ try:
         for surface, pos in outline_surfaces:
             screen.blit(surface, pos)
         screen.blit(text_surface, (10, 10))
-        
-        pygame.display.flip()
+
+        # Show the picture right on its deadline, or skip it if we were too slow
+        if scheduler.wait_to_present():
+            pygame.display.flip()
+            scheduler.presented()
+            startup_timer.finish()  # Print how long it took to get the first picture up
 
 finally:
+    print("Frame timing:", scheduler.stats())
+    print("Idle mode:", idle_detector.stats())
+    param_watcher.stop()
+    if filter_pool is not None:
+        filter_pool.close()
+    if recorder is not None:
+        recorder.close()
     cap.release()
     pygame.quit()
@@ -3,6 +3,8 @@ import cv2  # This lets us use the camera and change pictures
 import numpy as np  # This helps us do math with lots of numbers at once
 import threading
 import sys
+from frame_scheduler import FrameScheduler  # This keeps the pictures coming at a steady pace
+from dog_filter import DEFAULT_PARAMS, FilterState, apply_dog_vision_filter
 
 # Start pygame so we can use it to show stuff on the screen
 pygame.init()
@@ -22,8 +24,8 @@ frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 # Make a full-screen window that matches the camera’s picture size
 screen = pygame.display.set_mode((frame_width, frame_height), pygame.FULLSCREEN)
 
-# This is like a timer to keep the pictures moving smoothly
-clock = pygame.time.Clock()
+# This is like a timer to keep the pictures moving smoothly (30 pictures per second, like the camera)
+scheduler = FrameScheduler(fps=30)
 
 # Modes: 1 - Full Human, 2 - Full Dog Vision, 3 - Split View
 mode = 3  # Default to split view
@@ -31,21 +33,8 @@ mode = 3  # Default to split view
 # Make a font to write words on the screen
 font = pygame.font.Font(None, 36)
 
-def apply_dog_vision_filter(frame):
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
-    s = s.astype(np.float32)
-    blue_mask = (h >= 100) & (h <= 140)
-    s[blue_mask] = np.minimum(s[blue_mask] * 1.5, 255)
-    yellow_mask = (h >= 20) & (h <= 40)
-    s[yellow_mask] = np.minimum(s[yellow_mask] * 1.5, 255)
-    red_green_mask = (h < 20) | ((h > 40) & (h < 100))
-    s[red_green_mask] = np.maximum(s[red_green_mask] * 0.1, 0)
-    non_blue_yellow_mask = ~(blue_mask | yellow_mask | red_green_mask)
-    s[non_blue_yellow_mask] = np.maximum(s[non_blue_yellow_mask] * 0.5, 0)
-    s = s.astype(np.uint8)
-    hsv = cv2.merge([h, s, v])
-    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+# This picks how the dog vision looks (no blur here, and the picture is split in half)
+filter_state = FilterState(dict(DEFAULT_PARAMS, blur_kernel=1, split=0.5))
 
 def read_keyboard_input():
     global mode
@@ -63,6 +52,9 @@ threading.Thread(target=read_keyboard_input, daemon=True).start()
 
 try:
     while True:
+        # Wait until just before the next deadline so the picture we grab is the newest one
+        scheduler.wait_to_start()
+
         ret, frame = cap.read()
         if not ret:
             print("Oops! Couldn’t get a picture from the camera.")
@@ -71,12 +63,12 @@ try:
         frame = cv2.flip(frame, 1)
         
         if mode == 2:
-            frame = apply_dog_vision_filter(frame)
+            frame = apply_dog_vision_filter(frame, filter_state)
         elif mode == 3:
-            middle = frame.shape[0] // 2
+            middle = int(frame.shape[0] * filter_state.split)
             left_half = frame[:middle, :]
             right_half = frame[middle:, :]
-            right_half_dog = apply_dog_vision_filter(right_half)
+            right_half_dog = apply_dog_vision_filter(right_half, filter_state)
             frame = np.vstack((left_half, right_half_dog))
         
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -87,7 +79,10 @@ try:
         text_surface = font.render(f"Mode: {mode_text}", True, (255, 255, 255))
         screen.blit(text_surface, (10, 10))
         
-        pygame.display.flip()
+        # Show the new picture on the screen right on time (or skip it if we were too slow)
+        if scheduler.wait_to_present():
+            pygame.display.flip()
+            scheduler.presented()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
@@ -95,5 +90,6 @@ try:
             if event.type == pygame.MOUSEBUTTONDOWN:
                 mode = (mode % 3) + 1
 finally:
+    print("Frame timing:", scheduler.stats())  # How steady the pictures were
     cap.release()
     pygame.quit()
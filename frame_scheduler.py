@@ -0,0 +1,160 @@
+import time
+
+
+def display_refresh_rate(default=30):
+    """
+    Ask pygame how fast the screen refreshes (in frames per second).
+    Older pygame versions and some drivers can't tell us, so we fall back to the default.
+    """
+    try:
+        import pygame
+        rates = pygame.display.get_desktop_refresh_rates()
+    except Exception:
+        return default
+    if not rates or rates[0] <= 0:
+        return default
+    return rates[0]
+
+
+class FrameScheduler:
+    """
+    Keeps the pictures coming at a steady pace using fixed deadlines on a clock.
+
+    Instead of sleeping a fixed amount *after* each frame (like clock.tick does),
+    every frame has its own deadline: start + n * period. We wait until just before
+    the deadline to grab a picture (so it is as fresh as possible). Deadlines we know we
+    can't make (because the work usually takes longer than the time left) are skipped
+    before we start, and a frame that still comes out late is thrown away rather than
+    shown late, unless the screen hasn't changed for several periods. So on a slow
+    computer the pictures come less often, but they always keep coming.
+
+    Use it like this:
+
+        scheduler.wait_to_start()      # sleep until it's time to start work
+        ... grab a picture, filter it, draw it ...
+        if scheduler.wait_to_present():
+            pygame.display.flip()
+            scheduler.presented()
+    """
+
+    # How long before a deadline we stop sleeping and spin instead (sleep is not precise)
+    SPIN_SECONDS = 0.001
+
+    # How much extra time we leave on top of the usual work time, as a fraction of the period
+    SAFETY_MARGIN = 0.15
+
+    # A late frame is still shown if nothing has been shown for this many periods
+    STALE_PERIODS = 3
+
+    def __init__(self, fps=None, clock=time.perf_counter, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._deadline = None
+        self.set_fps(fps if fps else display_refresh_rate())
+        self._work_started = None
+        self._last_presented = None
+        # Exponential average of how long one frame of work takes
+        self._work_estimate = 0.0
+
+        # Stats about how well we're keeping time
+        self.frames_presented = 0
+        self.frames_dropped = 0
+        self.frames_skipped = 0
+        self.deadlines_missed = 0
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+
+    def set_fps(self, fps):
+        """Change the target frame rate. The next deadline is moved to match the new pace."""
+        self.fps = float(fps)
+        self.period = 1.0 / self.fps
+        if self._deadline is not None:
+            self._deadline = self._clock() + self.period
+
+    def _sleep_until(self, target):
+        # Sleep most of the way, then spin for the last little bit so we wake up on time
+        remaining = target - self._clock()
+        if remaining > self.SPIN_SECONDS:
+            self._sleep(remaining - self.SPIN_SECONDS)
+        while self._clock() < target:
+            pass
+
+    def wait_to_start(self):
+        """
+        Sleep until the last moment we can start work on the next frame and still make its deadline.
+        Starting late means we use the newest picture from the camera.
+        """
+        now = self._clock()
+        if self._deadline is None:
+            self._deadline = now + self.period
+
+        # Skip ahead to the first deadline we can still make, going by how long the work
+        # usually takes. No work has been done for those, so they count as missed, not dropped.
+        while self._deadline - now < self._work_estimate or self._deadline <= now:
+            self._deadline += self.period
+            self.deadlines_missed += 1
+
+        start_at = self._deadline - self._work_estimate - self.SAFETY_MARGIN * self.period
+        if start_at > now:
+            self._sleep_until(start_at)
+        self._work_started = self._clock()
+
+    def wait_to_present(self):
+        """
+        Call this when the frame is ready. Returns True if it should be shown (after waiting
+        for its deadline), or False if it missed the deadline and should be dropped.
+        A late frame is still shown if nothing has been shown for STALE_PERIODS periods.
+        """
+        now = self._clock()
+        if self._work_started is not None:
+            work = now - self._work_started
+            # Blend in the new work time slowly so one slow frame doesn't throw us off
+            self._work_estimate = 0.9 * self._work_estimate + 0.1 * work if self._work_estimate else work
+
+        if now > self._deadline:
+            screen_is_stale = (
+                self._last_presented is None
+                or now - self._last_presented > self.STALE_PERIODS * self.period
+            )
+            if screen_is_stale:
+                return True
+            self.frames_dropped += 1
+            self._deadline += self.period
+            return False
+
+        self._sleep_until(self._deadline)
+        return True
+
+    def skip(self):
+        """
+        Call this instead of wait_to_present when there's nothing new to show (the screen
+        keeps the last picture). We just move on to the next deadline.
+        """
+        self.frames_skipped += 1
+        self._deadline += self.period
+
+    def presented(self):
+        """Call this right after the frame is on the screen, so we can measure how close we got."""
+        now = self._clock()
+        self._last_presented = now
+        jitter = abs(now - self._deadline)
+        self._jitter_sum += jitter
+        self._jitter_max = max(self._jitter_max, jitter)
+        self.frames_presented += 1
+        self._deadline += self.period
+
+    def stats(self):
+        """How well we've kept time so far (times are in milliseconds)."""
+        presented = self.frames_presented
+        total = presented + self.frames_dropped
+        return {
+            "fps": self.fps,
+            "presented": presented,
+            "dropped": self.frames_dropped,
+            "skipped": self.frames_skipped,
+            "missed": self.deadlines_missed,
+            "drop_rate": self.frames_dropped / total if total else 0.0,
+            "jitter_mean_ms": 1000.0 * self._jitter_sum / presented if presented else 0.0,
+            "jitter_max_ms": 1000.0 * self._jitter_max,
+            "work_ms": 1000.0 * self._work_estimate,
+        }
@@ -0,0 +1,88 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class SceneIdleDetector:
+    """
+    Notices when nothing in front of the camera is moving, so we can slow everything down.
+
+    Each picture is shrunk to a tiny thumbnail (that's cheap and hides camera noise) and
+    compared with the thumbnail before it, cell by cell. If fewer than changed_cells
+    cells differ by more than cell_threshold for idle_after seconds, the scene is "idle".
+    Counting cells (instead of averaging the whole picture) means something small or
+    faint at the edge still counts as movement. While idle we compare against the
+    thumbnail from when we went idle (what's still on the screen), and the first
+    picture that differs wakes us straight back up.
+    """
+
+    def __init__(self, cell_threshold=12, changed_cells=2, idle_after=10.0, thumbnail_size=(32, 24), clock=time.monotonic):
+        self.cell_threshold = cell_threshold
+        self.changed_cells = changed_cells
+        self.idle_after = idle_after
+        self.thumbnail_size = thumbnail_size
+        self._clock = clock
+
+        self.idle = False
+        self._reference = None
+        self._last_motion = clock()
+        self._idle_since = None
+
+        # Numbers we can look at to see how the idle mode is doing
+        self.last_changed_cells = 0
+        self.idle_entries = 0
+        self.idle_exits = 0
+        self.idle_seconds = 0.0
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        return small.astype(np.int16)
+
+    def update(self, frame):
+        """Look at a new picture. Returns True if the scene is (still) idle."""
+        now = self._clock()
+        thumbnail = self._thumbnail(frame)
+
+        if self._reference is None:
+            self._reference = thumbnail
+            self._last_motion = now
+            return False
+
+        # How many cells changed a lot in any colour
+        difference = np.abs(thumbnail - self._reference).max(axis=2)
+        self.last_changed_cells = int(np.count_nonzero(difference > self.cell_threshold))
+        moved = self.last_changed_cells >= self.changed_cells
+
+        if self.idle:
+            if moved:
+                # Something moved: wake up right away
+                self.idle = False
+                self.idle_exits += 1
+                self.idle_seconds += now - self._idle_since
+                self._idle_since = None
+                self._reference = thumbnail
+                self._last_motion = now
+            return self.idle
+
+        self._reference = thumbnail
+        if moved:
+            self._last_motion = now
+        elif now - self._last_motion >= self.idle_after:
+            self.idle = True
+            self.idle_entries += 1
+            self._idle_since = now
+        return self.idle
+
+    def stats(self):
+        """How much time we've spent idle and how often we went in and out of idle mode."""
+        idle_seconds = self.idle_seconds
+        if self.idle:
+            idle_seconds += self._clock() - self._idle_since
+        return {
+            "idle": self.idle,
+            "idle_entries": self.idle_entries,
+            "idle_exits": self.idle_exits,
+            "idle_seconds": idle_seconds,
+            "last_changed_cells": self.last_changed_cells,
+        }
@@ -0,0 +1,67 @@
+import os
+import threading
+
+from dog_filter import DEFAULT_PARAMS, load_params
+
+
+class ParamWatcher:
+    """
+    Watches the filter settings file and rebuilds the filter when it changes, without
+    ever making the picture loop wait.
+
+    build(params) makes whatever the loop needs from the settings (tables, surfaces, ...).
+    It runs on a background thread, and only when it has finished is the new result put
+    in watcher.state, in one go. The loop should read watcher.state once per picture and
+    use that for the whole picture, so a picture never mixes old and new settings.
+    If the file is missing or has a mistake in it, we keep using the last good settings.
+    """
+
+    def __init__(self, path, build, poll_seconds=0.5):
+        self.path = path
+        self._build = build
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self.reloads = 0
+
+        # Build the first state right away, so the loop has something to use from the start
+        self.state = None
+        self._last_seen = self._file_signature()
+        if self._last_seen is not None:
+            self._reload()
+        if self.state is None:
+            self.state = build(dict(DEFAULT_PARAMS))
+
+        self._thread = threading.Thread(target=self._watch, name="param-watcher", daemon=True)
+        self._thread.start()
+
+    def _file_signature(self):
+        # The file's change time and size: if either changes, somebody saved it
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _reload(self):
+        try:
+            params = load_params(self.path)
+            new_state = self._build(params)
+        except (OSError, ValueError, TypeError, KeyError) as error:
+            print(f"Couldn't use the filter settings from {self.path}: {error}")
+            return
+        # Swapping one reference is atomic, so the loop sees either the old state or the new one
+        self.state = new_state
+        self.reloads += 1
+        print(f"Loaded filter settings from {self.path}: {params}")
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            signature = self._file_signature()
+            if signature is None or signature == self._last_seen:
+                continue
+            self._last_seen = signature
+            self._reload()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
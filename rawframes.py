@@ -0,0 +1,239 @@
+import mmap
+import struct
+import time
+
+import cv2
+import numpy as np
+
+# What a raw frame file looks like:
+#
+#   header (64 bytes): magic, width, height, channels, dtype, fps, capacity, count, data offset
+#   timestamps:        capacity x float64 (seconds), one per frame
+#   frames:            capacity x (height x width x channels) pictures, one after another,
+#                      starting on a 4096-byte boundary so memory-mapped pictures line up nicely
+#
+# The pictures are stored exactly as the camera gave them (no JPEG or video compression),
+# so playing them back costs nothing but reading memory.
+MAGIC = b"DOGRAW1\0"
+HEADER_FORMAT = "<8sIII8sdQQQ"
+HEADER_SIZE = 64
+FPS_OFFSET = struct.calcsize("<8sIII8s")
+COUNT_OFFSET = struct.calcsize("<8sIII8sdQ")
+PAGE_SIZE = 4096
+
+
+def _data_offset(capacity):
+    end_of_timestamps = HEADER_SIZE + 8 * capacity
+    return (end_of_timestamps + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+
+class RawFrameRecorder:
+    """
+    Saves camera pictures into a raw frame file, so we can replay exactly what a kiosk saw.
+
+    The file has room for `capacity` pictures; write() returns False once it is full.
+    The whole file is memory-mapped up front, so saving a picture is just one memory copy
+    (well under a millisecond for 640x480) into the mapped slot; the operating system writes it to
+    disk in the background, outside the frame budget. The picture count is updated after
+    every picture, so a recording is still usable if the program stops suddenly.
+
+    close() flushes the whole file to disk, which can take a while for a big recording,
+    so call it when the program is finishing rather than in the middle of the loop.
+    The fps passed in is only a guess; close() replaces it with the rate the pictures
+    really came in at (the timestamps have the exact times either way).
+    """
+
+    def __init__(self, path, width, height, channels=3, dtype=np.uint8, fps=30.0, capacity=900, clock=time.time):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.fps = fps
+        self.capacity = capacity
+        self.count = 0
+        self._clock = clock
+        self._frame_shape = (height, width, channels)
+        self._frame_bytes = height * width * channels * self.dtype.itemsize
+        self._data_offset = _data_offset(capacity)
+
+        # Make the file full size straight away (the unused part takes no disk space)
+        self._file = open(path, "w+b")
+        self._file.truncate(self._data_offset + capacity * self._frame_bytes)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        struct.pack_into(
+            HEADER_FORMAT, self._map, 0, MAGIC, width, height, channels, self.dtype.str.encode("ascii"),
+            fps, capacity, 0, self._data_offset,
+        )
+        self._timestamps = np.ndarray((capacity,), dtype="<f8", buffer=self._map, offset=HEADER_SIZE)
+        self._frames = np.ndarray((capacity,) + self._frame_shape, dtype=self.dtype, buffer=self._map, offset=self._data_offset)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def write(self, frame, timestamp=None):
+        """Add a picture to the end of the file. Returns False (and saves nothing) if the file is full."""
+        if self.full:
+            return False
+        if frame.shape != self._frame_shape or frame.dtype != self.dtype:
+            raise ValueError(f"expected a {self.dtype} picture of shape {self._frame_shape}, got {frame.dtype} {frame.shape}")
+        if timestamp is None:
+            timestamp = self._clock()
+
+        index = self.count
+        self._frames[index] = frame
+        self._timestamps[index] = timestamp
+        self.count += 1
+        struct.pack_into("<Q", self._map, COUNT_OFFSET, self.count)
+        return True
+
+    def close(self):
+        """Finish the file, and cut off the slots we never used."""
+        if self._file is None:
+            return
+        if self.count > 1:
+            recorded_seconds = self._timestamps[self.count - 1] - self._timestamps[0]
+            if recorded_seconds > 0:
+                self.fps = (self.count - 1) / recorded_seconds
+                struct.pack_into("<d", self._map, FPS_OFFSET, self.fps)
+        self._frames = None
+        self._timestamps = None
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._data_offset + self.count * self._frame_bytes)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class RawFrameReplay:
+    """
+    Plays back a raw frame file. It works like cv2.VideoCapture (read, get, isOpened,
+    release), so it can be used instead of the camera.
+
+    The file is memory-mapped and every picture is a read-only NumPy view straight into
+    it, so nothing is decoded or copied. With paced=True pictures come out at the speed
+    they were recorded; with paced=False they come out as fast as you ask for them.
+
+    With live=True it acts like a camera that only keeps its newest picture: read()
+    never waits, and gives the newest picture that is due by now (going by the recorded
+    timestamps), skipping any that were missed or giving the same one again if the next
+    isn't due yet. That way the program reading it keeps its own pace, just like with
+    the real camera, and still sees everything at the speed it was recorded.
+    """
+
+    def __init__(self, path, paced=True, loop=False, live=False, clock=time.perf_counter, sleep=time.sleep):
+        self.paced = paced
+        self.loop = loop
+        self.live = live
+        self._clock = clock
+        self._sleep = sleep
+
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, width, height, channels, dtype, fps, capacity, count, data_offset = struct.unpack_from(HEADER_FORMAT, self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a raw frame file")
+
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+        # A recording that stopped suddenly may have a picture that wasn't finished
+        frame_bytes = height * width * channels * self.dtype.itemsize
+        count = min(count, (len(self._map) - data_offset) // frame_bytes)
+        self.timestamps = np.frombuffer(self._map, dtype="<f8", count=count, offset=HEADER_SIZE)
+        self.frames = np.frombuffer(
+            self._map, dtype=self.dtype, count=count * height * width * channels, offset=data_offset,
+        ).reshape(count, height, width, channels)
+
+        self._position = 0
+        self._pace_start = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+    def _wait_for(self, index):
+        # Sleep until this picture is due, measured from when the first one came out
+        if self._pace_start is None:
+            self._pace_start = self._clock() - (self.timestamps[index] - self.timestamps[0])
+            return
+        due = self._pace_start + (self.timestamps[index] - self.timestamps[0])
+        remaining = due - self._clock()
+        if remaining > 0:
+            self._sleep(remaining)
+
+    def _newest_due(self):
+        # The recorded time that matches now, counting from when the first picture came out
+        if self._pace_start is None:
+            self._pace_start = self._clock()
+        recorded_now = self.timestamps[0] + (self._clock() - self._pace_start)
+        newest = int(np.searchsorted(self.timestamps, recorded_now, side="right")) - 1
+        # Never go backwards (the clock can't, but a recording's timestamps might)
+        return max(newest, self._position - 1, 0)
+
+    def read(self):
+        """Get the next picture as (True, picture), or (False, None) when there are no more."""
+        if self.frames is None or len(self.frames) == 0:
+            return False, None
+        if self._position >= len(self.frames):
+            # The last picture has been given out, so the recording is over
+            if not self.loop:
+                return False, None
+            self._position = 0
+            self._pace_start = None
+        if self.live:
+            index = self._newest_due()
+            self._position = index + 1
+            return True, self.frames[index]
+        index = self._position
+        self._position += 1
+        if self.paced:
+            self._wait_for(index)
+        return True, self.frames[index]
+
+    def isOpened(self):
+        return self.frames is not None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        return 0.0
+
+    def set(self, prop, value):
+        # Nothing to change on a recording (the camera's buffer size and so on)
+        return False
+
+    def release(self):
+        if self._map is None:
+            return
+        self.frames = None
+        self.timestamps = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Someone still holds a picture from the file; it closes when they let go of it
+            pass
+        self._file.close()
+        self._map = None
@@ -0,0 +1,289 @@
+import multiprocessing
+import os
+import signal
+from multiprocessing import connection, shared_memory
+
+import cv2
+import numpy as np
+
+from dog_filter import DEFAULT_STATE, FilterState, apply_dog_vision_filter
+
+
+class FrameRing:
+    """
+    A row of picture slots that lives in shared memory, so several processes can read and
+    write the same pictures without copying them or sending them through a pipe.
+
+    Make one with FrameRing(slots, shape) in the main process, and open the same one in
+    another process with FrameRing(slots, shape, name=ring.name).
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._owner = name is None
+        if self._owner:
+            self._memory = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self._memory.buf)
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def close(self):
+        """Let go of the shared memory (and delete it, if we're the one who made it)."""
+        if self._memory is None:
+            return
+        self.frames = None
+        try:
+            self._memory.close()
+        except BufferError:
+            # Someone still holds a view of a slot; the memory goes away when they let go of it
+            pass
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
+
+
+def filter_strip(source, destination, top, bottom, start_row=0, state=DEFAULT_STATE):
+    """
+    Filter rows top..bottom of source into the same rows of destination.
+    Rows above start_row are copied as they are (that's the human-vision part of the split view).
+    The blur needs a few rows above and below the strip, so we read a little extra
+    and only keep the middle, which gives exactly the same result as filtering the whole picture.
+    """
+    copy_bottom = min(bottom, start_row)
+    if copy_bottom > top:
+        destination[top:copy_bottom] = source[top:copy_bottom]
+    top = max(top, start_row)
+    if bottom <= top:
+        return
+
+    halo_top = max(start_row, top - state.blur_radius)
+    halo_bottom = min(source.shape[0], bottom + state.blur_radius)
+    filtered = apply_dog_vision_filter(source[halo_top:halo_bottom], state)
+    destination[top:bottom] = filtered[top - halo_top:bottom - halo_top]
+
+
+def _split_rows(height, count):
+    edges = np.linspace(0, height, count + 1).astype(int)
+    return [(int(top), int(bottom)) for top, bottom in zip(edges[:-1], edges[1:]) if bottom > top]
+
+
+def _worker_main(input_name, output_name, slots, shape, conn):
+    # The main program handles Ctrl-C and tells us when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The processes are what run in parallel, so each one only needs one OpenCV thread
+    cv2.setNumThreads(1)
+
+    inputs = FrameRing(slots, shape, name=input_name)
+    outputs = FrameRing(slots, shape, name=output_name)
+    state = DEFAULT_STATE
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break  # The main program went away
+            if task is None:
+                break
+            if isinstance(task, FilterState):
+                # New filter settings: use them for every strip from now on
+                state = task
+                continue
+            slot, top, bottom, start_row = task
+            filter_strip(inputs[slot], outputs[slot], top, bottom, start_row, state)
+            conn.send((slot, top))
+    finally:
+        inputs.close()
+        outputs.close()
+
+
+class ProcessFilterPool:
+    """
+    Runs the dog vision filter in several worker processes at once, so it isn't held
+    back by Python's GIL.
+
+    Pictures live in two shared-memory rings: the camera picture goes into an input slot,
+    each worker filters its own strip of rows into the matching output slot, and the
+    screen reads the output slot directly. Only tiny "do this strip" messages go
+    through the pipes.
+
+        index, slot = pool.next_input()
+        slot[:] = frame                  # or cv2.flip(frame, -1, slot), cap.read(slot), ...
+        pool.submit(index, start_row=middle)
+        dog_frame = pool.result(index)   # stays valid until this slot comes round again
+
+    If a worker crashes it is started again and given its unfinished strips. If it keeps
+    crashing on the same strip (more than MAX_RESTARTS times in a row), that strip is
+    filtered here in the main process instead of being sent again.
+    Call set_filter_state() to change the filter settings; strips already sent keep
+    the old settings and everything after uses the new ones.
+
+    Workers are started with "fork" by default, because our scripts don't have an
+    if __name__ == "__main__" guard (with "spawn" every worker would run the whole
+    script again). Make the pool before the main process does heavy OpenCV work.
+    """
+
+    # How long to wait for a worker before checking whether it is still alive (seconds)
+    POLL_SECONDS = 1.0
+
+    # How many times in a row a worker may be restarted without finishing a strip
+    MAX_RESTARTS = 3
+
+    def __init__(self, shape, workers=None, slots=3, start_method="fork"):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self._context = multiprocessing.get_context(start_method)
+        self.inputs = FrameRing(slots, self.shape)
+        self.outputs = FrameRing(slots, self.shape)
+
+        if not workers:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        self._strips = _split_rows(self.shape[0], workers)
+        self._processes = [None] * len(self._strips)
+        self._connections = [None] * len(self._strips)
+        self._unfinished = [[] for _ in self._strips]  # Strips each worker hasn't finished yet
+        self._pending = {}  # slot -> how many strips are still being filtered
+        self._next_slot = 0
+        self.restarts = 0
+        self._crashes = [0] * len(self._strips)  # Restarts since each worker last finished a strip
+        self.filter_state = DEFAULT_STATE
+
+        for worker in range(len(self._strips)):
+            self._start_worker(worker)
+
+    @property
+    def workers(self):
+        return len(self._strips)
+
+    def _start_worker(self, worker):
+        parent_end, child_end = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.inputs.name, self.outputs.name, self.slots, self.shape, child_end),
+            name=f"dog-filter-{worker}",
+            daemon=True,
+        )
+        process.start()
+        child_end.close()
+        self._processes[worker] = process
+        self._connections[worker] = parent_end
+
+        # A restarted worker picks up where the old one stopped
+        if self.filter_state is not DEFAULT_STATE:
+            parent_end.send(self.filter_state)
+        for task in self._unfinished[worker]:
+            parent_end.send(task)
+
+    def _restart_worker(self, worker):
+        process = self._processes[worker]
+        print(f"Filter worker {worker} stopped (exit code {process.exitcode}), starting it again.")
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=1.0)
+        self._connections[worker].close()
+        self.restarts += 1
+        self._crashes[worker] += 1
+
+        unfinished = self._unfinished[worker]
+        if self._crashes[worker] > self.MAX_RESTARTS and unfinished:
+            # The oldest strip keeps killing the worker: filter it here instead of sending it again
+            slot, top, bottom, start_row = unfinished.pop(0)
+            print(f"Filter worker {worker} keeps stopping on rows {top}-{bottom}, filtering them here instead.")
+            filter_strip(self.inputs[slot], self.outputs[slot], top, bottom, start_row, self.filter_state)
+            self._pending[slot] -= 1
+            self._crashes[worker] = 0
+        self._start_worker(worker)
+
+    def _send(self, worker, task):
+        self._unfinished[worker].append(task)
+        try:
+            self._connections[worker].send(task)
+        except (BrokenPipeError, OSError):
+            self._restart_worker(worker)
+
+    def set_filter_state(self, state):
+        """Send new filter settings (a ready-made FilterState) to every worker."""
+        self.filter_state = state
+        for worker, conn in enumerate(self._connections):
+            try:
+                conn.send(state)
+            except (BrokenPipeError, OSError):
+                self._restart_worker(worker)
+
+    def next_input(self):
+        """Get the next free input slot as (index, picture) so the camera can write straight into it."""
+        index = self._next_slot
+        self._next_slot = (index + 1) % self.slots
+        if self._pending.get(index):
+            self.result(index)
+        return index, self.inputs[index]
+
+    def submit(self, index, start_row=0):
+        """Start filtering input slot `index` (rows from start_row down) into output slot `index`."""
+        self._pending[index] = len(self._strips)
+        for worker, (top, bottom) in enumerate(self._strips):
+            self._send(worker, (index, top, bottom, start_row))
+
+    def result(self, index):
+        """Wait for slot `index` to be filtered and return the output picture (no copy)."""
+        while self._pending.get(index):
+            self._collect()
+        self._pending.pop(index, None)
+        return self.outputs[index]
+
+    def _collect(self):
+        ready = connection.wait(self._connections, timeout=self.POLL_SECONDS)
+        if not ready:
+            # Nobody answered: make sure the workers we're waiting for are still alive
+            for worker, process in enumerate(self._processes):
+                if self._unfinished[worker] and not process.is_alive():
+                    self._restart_worker(worker)
+            return
+
+        for conn in ready:
+            worker = self._connections.index(conn)
+            try:
+                slot, top = conn.recv()
+            except (EOFError, OSError):
+                self._restart_worker(worker)
+                continue
+            self._crashes[worker] = 0
+            unfinished = self._unfinished[worker]
+            for position, task in enumerate(unfinished):
+                if task[0] == slot and task[1] == top:
+                    del unfinished[position]
+                    break
+            self._pending[slot] -= 1
+
+    def close(self):
+        """Tell the workers to stop, wait for them, and free the shared memory."""
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for conn in self._connections:
+            conn.close()
+        self.inputs.close()
+        self.outputs.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
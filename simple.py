@@ -1,6 +1,7 @@
 import pygame
 import cv2
 import numpy as np
+from frame_scheduler import FrameScheduler
 
 # Initialize pygame
 pygame.init()
@@ -22,10 +23,13 @@ print(f"width x height: {frame_width} x {frame_height}")
 # Set up full-screen display using pygame
 screen = pygame.display.set_mode((frame_width, frame_height), pygame.FULLSCREEN)
 
-# Set frame rate
-clock = pygame.time.Clock()
+# Set frame rate (30 FPS), using a deadline for each frame instead of sleeping after it
+scheduler = FrameScheduler(fps=30)
 
 while True:
+    # Wait until just before the next frame's deadline, so we capture the newest frame
+    scheduler.wait_to_start()
+
     # Capture frame-by-frame
     ret, frame = camera.read()
     
@@ -44,7 +48,10 @@ while True:
     
     # Display the frame on the screen
     screen.blit(frame_surface, (0, 0))
-    pygame.display.flip()
+    # Show the frame on its deadline, or drop it if it's too late
+    if scheduler.wait_to_present():
+        pygame.display.flip()
+        scheduler.presented()
 
     # Handle events to exit (e.g., pressing 'q' to quit)
     for event in pygame.event.get():
@@ -52,7 +59,3 @@ while True:
             cap.release()
             pygame.quit()
             exit()
-
-    # Limit the frame rate
-    clock.tick(30)  # Adjust to your desired frame rate (30 FPS here)
-
@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class StartupTimer:
+    """
+    Writes down how long each part of starting up takes, so we can see what makes boot slow.
+
+    Steps can run in the main thread (with timer.step("name"):) or in a background
+    thread (timer.run_in_background("name", function, ...)). When the first picture is
+    on the screen, call timer.finish() to print the breakdown.
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._finished = False
+        self.steps = []  # (name, started, ended) in seconds since the timer was made
+
+    def _record(self, name, started, ended):
+        with self._lock:
+            self.steps.append((name, started - self._t0, ended - self._t0))
+
+    def step(self, name):
+        """Time a block of code: with timer.step("load font"): ..."""
+        return _TimedStep(self, name)
+
+    def run_in_background(self, name, function, *args):
+        """
+        Run function(*args) in its own thread while the main thread keeps going.
+        Returns a Future: call .result() to wait for (and get) what the function gave back.
+        """
+        future = Future()
+
+        def work():
+            started = time.perf_counter()
+            try:
+                result = function(*args)
+            except BaseException as error:
+                self._record(name + " (background)", started, time.perf_counter())
+                future.set_exception(error)
+                return
+            # Write down the time before handing over the result, so that once .result()
+            # returns this thread isn't holding the timer's lock any more
+            self._record(name + " (background)", started, time.perf_counter())
+            future.set_result(result)
+
+        threading.Thread(target=work, name=name, daemon=True).start()
+        return future
+
+    def finish(self, name="first frame"):
+        """Mark the moment we're up and running and print the breakdown (only the first time)."""
+        if self._finished:
+            return
+        self._finished = True
+        now = time.perf_counter()
+        self._record(name, now, now)
+        self.report()
+
+    def report(self):
+        with self._lock:
+            steps = sorted(self.steps, key=lambda step: step[1])
+        print("Startup timing:")
+        for name, started, ended in steps:
+            print(f"  {name:<32} start {started * 1000:8.1f} ms   took {(ended - started) * 1000:8.1f} ms")
+
+
+class _TimedStep:
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._timer._record(self._name, self._started, time.perf_counter())
+        return False
+
+
+def open_camera(index=0):
+    """
+    Turn on the camera and find out how big its pictures are.
+    OpenCV is imported here (not at the top) so that the slow import happens in the
+    background thread too, while the main thread gets the screen ready.
+    Returns (camera, width, height).
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        return cap, 0, 0
+    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return cap, frame_width, frame_height
+
+
+def open_replay(path):
+    """
+    Open a raw frame recording to play back instead of the camera (see rawframes.py).
+    Returns (replay, width, height), just like open_camera.
+    The replay acts like a live camera: each read gives the newest picture due by the
+    recorded timestamps and never waits, so the loop keeps its own pace (active or idle)
+    and what it sees, including slow idle stretches, comes at the speed it was recorded.
+    """
+    from rawframes import RawFrameReplay
+
+    replay = RawFrameReplay(path, paced=False, live=True)
+    return replay, replay.width, replay.height
+
+
+def warm_up_filter(filter_function, shape, *args):
+    """
+    Run the filter once on a blank picture of the right size, so OpenCV and NumPy set up
+    their buffers and tables now instead of while the first real picture is waiting.
+    """
+    import numpy as np
+
+    filter_function(np.zeros(shape, dtype=np.uint8), *args)
@@ -0,0 +1,84 @@
+import math
+
+from frame_scheduler import FrameScheduler
+
+
+class FakeClock:
+    """A pretend clock: sleeping just moves the time forward, so the tests run instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        # Time moves on a tiny bit every time someone looks, so spin-waits always finish
+        self.now += 1e-6
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+def run_frames(work_seconds, frames=300, fps=30):
+    """work_seconds is how long each frame takes, or a function that gives it for frame number n."""
+    clock = FakeClock()
+    scheduler = FrameScheduler(fps=fps, clock=clock, sleep=clock.sleep)
+    shown = []
+    for n in range(frames):
+        scheduler.wait_to_start()
+        clock.sleep(work_seconds(n) if callable(work_seconds) else work_seconds)
+        shown.append(scheduler.wait_to_present())
+        if shown[-1]:
+            scheduler.presented()
+    scheduler.shown = shown
+    return scheduler, clock
+
+
+def test_fast_work_shows_almost_every_frame():
+    scheduler, _ = run_frames(0.020)
+    assert scheduler.frames_presented >= 295
+
+
+def test_work_longer_than_a_period_still_shows_frames():
+    for work in (0.036, 0.045, 0.070):
+        scheduler, clock = run_frames(work)
+        # Every picture we worked on gets shown, one every few deadlines
+        assert scheduler.frames_presented >= 0.9 * 300
+        periods_per_frame = math.ceil(work * 30)
+        assert scheduler.frames_presented / clock.now >= 0.9 * 30 / periods_per_frame
+
+
+def test_slow_spike_frame_is_dropped():
+    # 20 ms of work, but every 10th frame takes 40 ms and misses its deadline
+    scheduler, _ = run_frames(lambda n: 0.040 if n % 10 == 5 else 0.020)
+    spikes = range(5, 300, 10)
+    assert not any(scheduler.shown[n] for n in spikes)
+    assert scheduler.frames_dropped == len(spikes)
+    assert scheduler.frames_presented == 300 - len(spikes)
+
+
+def test_mixed_work_is_not_shown_late():
+    # Work that always fits in a period never misses a deadline
+    scheduler, _ = run_frames(lambda n: 0.025 if n % 2 else 0.032)
+    assert scheduler.frames_dropped == 0
+    assert scheduler.frames_presented == 300
+    # Only the very first frame (before we know how long work takes) comes out late
+    assert scheduler.stats()["jitter_mean_ms"] < 1.0
+
+
+def test_missed_deadlines_are_not_counted_as_dropped():
+    scheduler, _ = run_frames(0.045)
+    # Every picture we worked on was shown; the deadlines in between were just missed
+    assert scheduler.frames_presented == 300
+    assert scheduler.frames_dropped == 0
+    assert scheduler.deadlines_missed > 0
+    assert scheduler.stats()["drop_rate"] == 0.0
+
+
+def test_idle_skip_does_not_count_as_dropped():
+    clock = FakeClock()
+    scheduler = FrameScheduler(fps=30, clock=clock, sleep=clock.sleep)
+    for _ in range(10):
+        scheduler.wait_to_start()
+        scheduler.skip()
+    assert scheduler.frames_skipped == 10
+    assert scheduler.frames_dropped == 0
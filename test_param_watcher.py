@@ -0,0 +1,94 @@
+import json
+import time
+
+import pytest
+
+from dog_filter import DEFAULT_PARAMS, MAX_BLUR_KERNEL, FilterState, load_params
+from param_watcher import ParamWatcher
+
+
+def write_settings(path, text):
+    path.write_text(text if isinstance(text, str) else json.dumps(text))
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the watcher"
+        time.sleep(0.01)
+
+
+def test_load_params_fills_in_defaults(tmp_path):
+    path = tmp_path / "dogvision.json"
+    write_settings(path, {"split": 0.5})
+    assert load_params(path) == dict(DEFAULT_PARAMS, split=0.5)
+
+
+@pytest.mark.parametrize("text", ["{not json", "[1, 2]", '{"blur": 5}'])
+def test_load_params_rejects_bad_files(tmp_path, text):
+    path = tmp_path / "dogvision.json"
+    write_settings(path, text)
+    with pytest.raises(ValueError):
+        load_params(path)
+
+
+@pytest.mark.parametrize("changes", [
+    {"split": 1.0},
+    {"split": -0.1},
+    {"split": "0.5"},
+    {"blur_kernel": 0},
+    {"blur_kernel": 4},
+    {"blur_kernel": 11.0},
+    {"blur_kernel": True},
+    {"blur_kernel": MAX_BLUR_KERNEL + 2},
+    {"boost_gain": None},
+    {"boost_gain": float("nan")},
+    {"other_gain": -1},
+    {"blue_hue": [100]},
+    {"yellow_hue": [40, 20]},
+    {"yellow_hue": ["20", 40]},
+])
+def test_filter_state_rejects_bad_settings(changes):
+    with pytest.raises(ValueError):
+        FilterState(dict(DEFAULT_PARAMS, **changes))
+
+
+def test_filter_state_accepts_edge_settings():
+    state = FilterState(dict(DEFAULT_PARAMS, split=0.0, blur_kernel=MAX_BLUR_KERNEL, boost_gain=0))
+    assert state.blur_kernel == (MAX_BLUR_KERNEL, MAX_BLUR_KERNEL)
+    assert state.saturation_table.max() <= 255
+
+
+def test_watcher_reloads_good_settings_and_keeps_them_through_bad_ones(tmp_path, capsys):
+    path = tmp_path / "dogvision.json"
+    write_settings(path, {"split": 0.25})
+    watcher = ParamWatcher(path, FilterState, poll_seconds=0.01)
+    try:
+        assert watcher.state.split == 0.25
+
+        # A good change is picked up and swapped in
+        write_settings(path, {"split": 0.5, "blur_kernel": 5})
+        wait_until(lambda: watcher.reloads == 2)
+        good_state = watcher.state
+        assert good_state.split == 0.5
+        assert good_state.blur_kernel == (5, 5)
+
+        # Bad changes are reported, and the last good settings stay in use
+        for bad in ('{"split": 0.6', {"colour": 1}, {"split": 1.0}, {"boost_gain": None}, {"blur_kernel": 301}):
+            capsys.readouterr()
+            write_settings(path, bad)
+            wait_until(lambda: "Couldn't use the filter settings" in capsys.readouterr().out)
+            assert watcher.state is good_state
+        assert watcher.reloads == 2
+    finally:
+        watcher.stop()
+
+
+def test_watcher_starts_with_defaults_when_the_file_is_bad(tmp_path):
+    path = tmp_path / "dogvision.json"
+    write_settings(path, "{oops")
+    watcher = ParamWatcher(path, FilterState, poll_seconds=0.01)
+    try:
+        assert watcher.state.params == DEFAULT_PARAMS
+    finally:
+        watcher.stop()
@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+
+from rawframes import RawFrameRecorder, RawFrameReplay
+
+
+class FakeClock:
+    """A pretend clock that only moves when the test says so."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_frames(count, height=6, width=8):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (count, height, width, 3), dtype=np.uint8)
+
+
+def test_write_close_replay_round_trip(tmp_path):
+    path = tmp_path / "round_trip.raw"
+    frames = make_frames(5)
+    with RawFrameRecorder(path, 8, 6, fps=30.0, capacity=10) as recorder:
+        for index, frame in enumerate(frames):
+            assert recorder.write(frame, timestamp=100.0 + index * 0.25)
+
+    replay = RawFrameReplay(path, paced=False)
+    assert len(replay) == 5
+    assert np.array_equal(replay.frames, frames)
+    assert np.allclose(replay.timestamps, 100.0 + np.arange(5) * 0.25)
+    # The header has the rate the pictures really came in at, not the guess
+    assert replay.fps == 4.0
+    assert [frame.tobytes() for frame in replay] == [frame.tobytes() for frame in frames]
+    replay.release()
+
+
+def test_full_recorder_stops_writing(tmp_path):
+    path = tmp_path / "full.raw"
+    frames = make_frames(3)
+    recorder = RawFrameRecorder(path, 8, 6, capacity=2)
+    assert recorder.write(frames[0], timestamp=0.0)
+    assert recorder.write(frames[1], timestamp=0.1)
+    assert recorder.full
+    assert not recorder.write(frames[2], timestamp=0.2)
+    recorder.close()
+
+    replay = RawFrameReplay(path, paced=False)
+    assert len(replay) == 2
+    replay.release()
+
+
+def test_unclosed_recording_keeps_its_frames(tmp_path):
+    # Like the program stopping suddenly: the file is never closed
+    path = tmp_path / "crashed.raw"
+    frames = make_frames(3)
+    recorder = RawFrameRecorder(path, 8, 6, capacity=10)
+    for index, frame in enumerate(frames):
+        recorder.write(frame, timestamp=float(index))
+
+    replay = RawFrameReplay(path, paced=False)
+    assert len(replay) == 3
+    assert np.array_equal(replay.frames, frames)
+    replay.release()
+    recorder.close()
+
+
+def test_empty_recording(tmp_path):
+    path = tmp_path / "empty.raw"
+    with RawFrameRecorder(path, 8, 6, capacity=0) as recorder:
+        assert recorder.full
+        assert not recorder.write(make_frames(1)[0])
+
+    replay = RawFrameReplay(path, paced=False)
+    assert len(replay) == 0
+    assert replay.read() == (False, None)
+    replay.release()
+
+
+def test_live_replay_follows_recorded_times(tmp_path):
+    # Three quick pictures, then a slow (idle) stretch with a quarter second between pictures
+    path = tmp_path / "live.raw"
+    times = [0.0, 0.03, 0.06, 0.31, 0.56]
+    with RawFrameRecorder(path, 8, 6, capacity=len(times)) as recorder:
+        for frame, timestamp in zip(make_frames(len(times)), times):
+            recorder.write(frame, timestamp=timestamp)
+
+    clock = FakeClock()
+    replay = RawFrameReplay(path, paced=False, live=True, clock=clock)
+    shown = []
+    # Read 30 times a second, like the kiosk does, for 0.6 seconds
+    for tick in range(18):
+        clock.now = tick / 30
+        ret, _ = replay.read()
+        assert ret
+        shown.append(int(replay.get(cv2.CAP_PROP_POS_FRAMES)) - 1)
+
+    # Every read gets the newest picture recorded by then, so the slow pictures repeat
+    expected = [max(i for i, t in enumerate(times) if t <= tick / 30) for tick in range(18)]
+    assert shown == expected
+    assert shown.count(3) == 7  # 0.25 seconds of reads, 30 a second
+
+    # Once the last picture has been given out the recording is over
+    assert replay.read() == (False, None)
+    replay.release()